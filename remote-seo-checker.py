@@ -37,28 +37,92 @@ This remote MCP server provides comprehensive SEO analysis including:
 """
 
 import asyncio
+import codecs
 import json
 import logging
+import os
 import re
 import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 import aiohttp
-from bs4 import BeautifulSoup
-from fastmcp import FastMCP
+from bs4 import BeautifulSoup, FeatureNotFound
+from fastmcp import Context, FastMCP
+from yarl import URL
+
+# Prefer orjson for resource serialization; fall back to the stdlib encoder
+try:
+    import orjson
+    
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2, default=str)
 
 # Configure logging for the MCP server
-logging.basicConfig(level=logging.INFO)
+# Defaults to WARNING; set SEO_LOG_LEVEL (e.g. INFO, DEBUG) for verbose output
+logging.basicConfig(level=os.environ.get("SEO_LOG_LEVEL", "WARNING").upper())
 logger = logging.getLogger("seo-checker")
 
+@asynccontextmanager
+async def server_lifespan(server: FastMCP):
+    """Close the shared HTTP session when the MCP server shuts down"""
+    try:
+        yield
+    finally:
+        await seo_checker.close()
+
 # Create the FastMCP server instance
 # This is the main MCP server object that will handle client connections
 mcp = FastMCP(
     name="Professional SEO Checker",
-    instructions="When asked about SEO analysis, page optimization, meta tags, or search engine optimization, use the appropriate SEO checking tools."
+    instructions="When asked about SEO analysis, page optimization, meta tags, or search engine optimization, use the appropriate SEO checking tools.",
+    lifespan=server_lifespan
+)
+
+# Precompiled regular expressions used by the analyzers
+_CHARSET_RE = re.compile(r'charset=([^;]+)')
+# Scans for the real </head>: raw-text elements and comments are skipped
+# whole, and an unterminated one (last group) means the scan must give up
+_HEAD_END_RE = re.compile(r'<(script|style|title)\b.*?</\1\s*>|<!--.*?-->|(</head\s*>)|(<script\b|<style\b|<title\b|<!--)', re.IGNORECASE | re.DOTALL)
+
+# Header levels H1-H6, indexed 0-5 in the header analysis
+_HEADER_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6"]
+
+# Analysis sections run by analyze_page_seo; tools may request a subset
+_ALL_SECTIONS = frozenset({"title", "meta", "headers", "content", "images", "technical", "social"})
+_META_TAG_SECTIONS = frozenset({"title", "meta", "social"})
+# Sections whose analyses only read elements inside <head>
+_HEAD_SECTIONS = frozenset({"title", "meta", "social"})
+
+# Social tags checked for the Open Graph and Twitter Card scores
+_ESSENTIAL_OG = ('title', 'description', 'image', 'url')
+_ESSENTIAL_TWITTER = ('card', 'title', 'description')
+
+# Overall SEO score weights for sections that carry their own "score";
+# the meta description (15%) and technical SEO (20%) are scored separately
+_SEO_WEIGHTS = (
+    ("title_analysis", 0.20),    # critical for rankings
+    ("header_analysis", 0.15),   # content structure
+    ("content_analysis", 0.20),  # content quality
+    ("image_analysis", 0.10),    # accessibility and SEO
 )
 
+@lru_cache(maxsize=1024)
+def _normalize_url(url: str) -> Tuple[str, str]:
+    """Ensure the URL has a protocol and return it with its domain
+    
+    Memoized so repeated checks of the same URL skip re-parsing.
+    """
+    if not url.startswith(('http://', 'https://')):
+        url = f'https://{url}'
+    return url, urlparse(url).netloc
+
 class SEOChecker:
     """Professional SEO analysis tool with comprehensive website evaluation
     
@@ -71,23 +135,185 @@ class SEOChecker:
         # Configure reasonable timeouts to prevent hanging requests
         self.default_timeout = 20
         self.user_agent = "Mozilla/5.0 (SEO Checker MCP Server; +https://srv563806.hstgr.cloud/seo-bot)"
+        # Built once and shared by every request made through the session
+        self._timeout = aiohttp.ClientTimeout(total=self.default_timeout, connect=10, sock_read=20)
+        self._base_headers = {'User-Agent': self.user_agent}
+        # Shared HTTP session, created lazily on first use so keep-alive
+        # connections are reused across tool calls instead of re-handshaking
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Short-lived result cache so back-to-back tool calls on the same URL
+        # (e.g. analyze_seo then seo_meta_tags_check) share a single fetch,
+        # bounded to the most recently used entries
+        self.cache_ttl = 60
+        self.cache_max_entries = 256
+        self._cache: "OrderedDict[Tuple[str, FrozenSet[str]], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, FrozenSet[str]], asyncio.Future] = {}
+        # Caps concurrent batch analyses across all callers so large batches
+        # queue instead of oversubscribing the shared connection pool; the
+        # semaphore is sized from max_concurrency when first needed
+        self.max_concurrency = 16
+        self._analysis_semaphore: Optional[asyncio.Semaphore] = None
+        # Upper bound on distinct URLs accepted by a single batch check
+        self.max_batch_urls = 50
+        # Largest page body read; bigger pages are truncated and flagged
+        self.max_page_bytes = 5_000_000
+        # Redirect hops followed before giving up on a page
+        self.max_redirects = 5
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                resolver=self._build_resolver(),
+                use_dns_cache=True,
+                limit=100,
+                limit_per_host=20,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                headers=self._base_headers,
+                # Don't carry cookies from one analyzed site into the next request
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trace_configs=[self._build_trace_config()]
+            )
+        return self._session
+    
+    @staticmethod
+    def _build_resolver() -> Optional[aiohttp.abc.AbstractResolver]:
+        """Use the aiodns-backed resolver when available
+        
+        Falls back to aiohttp's default threaded getaddrinfo resolver
+        when aiodns is not installed.
+        """
+        try:
+            return aiohttp.AsyncResolver()
+        except RuntimeError:
+            return None
+    
+    @staticmethod
+    def _build_trace_config() -> aiohttp.TraceConfig:
+        """Record request phase timestamps for the timing breakdown
+        
+        Each hook writes a perf_counter timestamp into the dict passed as
+        trace_request_ctx, so _fetch_page_with_timing can separate DNS and
+        connection setup from the server's actual response time. DNS and
+        connect hooks only fire when aiohttp resolves a host or opens a new
+        connection, so cached lookups and pooled connections report 0. With
+        redirects, DNS and connect times describe the final hop only.
+        """
+        trace_config = aiohttp.TraceConfig()
+        
+        def mark(name: str):
+            async def hook(session, trace_config_ctx, params):
+                trace_config_ctx.trace_request_ctx[name] = time.perf_counter()
+            return hook
+        
+        # A redirect starts a new hop; drop the previous hop's DNS and connect
+        # timestamps so the breakdown only describes the final hop
+        async def on_redirect(session, trace_config_ctx, params):
+            trace = trace_config_ctx.trace_request_ctx
+            for name in ("dns_start", "dns_end", "connect_start", "connect_end"):
+                trace.pop(name, None)
+            trace["redirect_end"] = time.perf_counter()
+        
+        trace_config.on_dns_resolvehost_start.append(mark("dns_start"))
+        trace_config.on_dns_resolvehost_end.append(mark("dns_end"))
+        trace_config.on_connection_create_start.append(mark("connect_start"))
+        trace_config.on_connection_create_end.append(mark("connect_end"))
+        trace_config.on_request_headers_sent.append(mark("headers_sent"))
+        trace_config.on_request_redirect.append(on_redirect)
+        return trace_config
+    
+    async def close(self):
+        """Close the shared HTTP session and release pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
-    async def analyze_page_seo(self, url: str) -> Dict[str, Any]:
+    def flush_dns(self, url: Optional[str] = None):
+        """Drop cached DNS lookups so the next requests resolve hosts afresh
+        
+        The connector caches resolved addresses for ttl_dns_cache seconds;
+        this is mainly useful in tests or after a site moves hosts. Pass a
+        URL to forget only its host, or nothing to clear the whole cache.
+        The cache is keyed by host and port together, so the port comes from
+        the URL or, if it has none, from its scheme.
+        """
+        if self._session is None or self._session.closed:
+            return
+        if url is None:
+            self._session.connector.clear_dns_cache()
+        else:
+            target = URL(_normalize_url(url)[0])
+            self._session.connector.clear_dns_cache(target.raw_host, target.port)
+    
+    async def analyze_page_seo(self, url: str, sections: FrozenSet[str] = _ALL_SECTIONS, force_refresh: bool = False) -> Dict[str, Any]:
         """Comprehensive SEO analysis of a webpage
         
         This is the main async method that coordinates all SEO analysis.
         MCP tools must be async to avoid blocking the server.
-        """
-        # Ensure URL has protocol for proper parsing
-        if not url.startswith(('http://', 'https://')):
-            url = f'https://{url}'
         
-        parsed_url = urlparse(url)
+        `sections` selects which analyses to run (default: all). The overall
+        score and recommendations draw on every section, so they are only
+        produced by a full analysis.
         
+        Successful results are cached for `cache_ttl` seconds, and concurrent
+        requests for the same URL are coalesced onto a single analysis. A
+        cached or running full analysis also serves partial requests.
+        `force_refresh` skips the cache lookup; an analysis that is already
+        running is still shared, since it is no older than the request.
+        """
+        # Ensure URL has protocol for proper parsing
+        url, domain = _normalize_url(url)
+        
+        keys = [(url, sections)]
+        if sections != _ALL_SECTIONS:
+            keys.append((url, _ALL_SECTIONS))
+        
+        if not force_refresh:
+            for key in keys:
+                cached = self._cache.get(key)
+                if cached:
+                    if time.monotonic() - cached[0] < self.cache_ttl:
+                        self._cache.move_to_end(key)
+                        return cached[1]
+                    del self._cache[key]
+        
+        # Piggyback on an analysis of the same URL that is already running
+        task = next((self._inflight[key] for key in keys if key in self._inflight), None)
+        if task is None:
+            key = (url, sections)
+            task = asyncio.ensure_future(self._run_analysis(url, domain, sections))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_analysis(key, done))
+        
+        # Shield so one cancelled caller doesn't cancel the shared analysis
+        return await asyncio.shield(task)
+    
+    def _finish_analysis(self, key: Tuple[str, FrozenSet[str]], task: asyncio.Future):
+        """Release the in-flight slot and cache the result if it succeeded"""
+        self._inflight.pop(key, None)
+        
+        if task.cancelled() or task.exception() is not None or task.result()["status"] != "success":
+            self._cache.pop(key, None)
+            return
+        
+        self._cache[key] = (time.monotonic(), task.result())
+        self._cache.move_to_end(key)
+        # Evict least recently used entries so the cache stays bounded
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+    
+    async def _run_analysis(self, url: str, domain: str, sections: FrozenSet[str]) -> Dict[str, Any]:
+        """Fetch and analyze a normalized URL, bypassing the cache"""
         # Initialize result structure with all possible fields
         results = {
             "url": url,
-            "domain": parsed_url.netloc,
+            "domain": domain,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "status": "unknown",
             "seo_score": 0,
@@ -114,31 +340,84 @@ class SEOChecker:
                 results["status"] = "error"
                 return results
             
-            # Parse HTML content using BeautifulSoup for analysis
-            soup = BeautifulSoup(page_data["content"], 'html.parser')
+            # BeautifulSoup parsing and analysis are CPU-bound; run them in a
+            # worker thread so the event loop keeps serving other requests
+            await asyncio.to_thread(self._run_sync_pipeline, results, page_data, url, sections)
             
-            # Perform comprehensive SEO analyses
-            results["page_info"] = self._analyze_page_info(page_data, soup)
+            results["status"] = "success"
+            
+        except Exception as e:
+            results["status"] = "error"
+            results["errors"].append(str(e))
+            logger.error("SEO analysis failed for %s - %s", url, e)
+        
+        return results
+    
+    def _run_sync_pipeline(self, results: Dict[str, Any], page_data: Dict[str, Any], url: str, sections: FrozenSet[str]):
+        """Parse a fetched page and run the requested analyses
+        
+        Runs in a worker thread via asyncio.to_thread, so it must only touch
+        its arguments. Analysis fields are written straight into the
+        pre-built `results` report, which the awaiting caller owns.
+        """
+        # Head-only analyses don't need the body, so skip parsing it
+        html = page_data["content"]
+        if sections <= _HEAD_SECTIONS:
+            head_end = self._head_end(html)
+            if head_end is not None:
+                html = html[:head_end]
+        
+        # Parse HTML content using BeautifulSoup for analysis
+        soup = self._parse_html(html)
+        
+        # Perform the requested SEO analyses
+        results["page_info"] = self._analyze_page_info(page_data, soup)
+        if "title" in sections:
             results["title_analysis"] = self._analyze_title(soup)
+        if "meta" in sections:
             results["meta_analysis"] = self._analyze_meta_tags(soup)
+        if "headers" in sections:
             results["header_analysis"] = self._analyze_headers(soup)
-            results["content_analysis"] = self._analyze_content(soup, page_data["content"])
+        if "content" in sections:
+            # Extract the page text once so analyses don't re-walk the tree
+            text_content = soup.get_text()
+            results["content_analysis"] = self._analyze_content(text_content, page_data["content"])
+        if "images" in sections:
             results["image_analysis"] = self._analyze_images(soup, url)
+        if "technical" in sections:
             results["technical_seo"] = self._analyze_technical_seo(soup, page_data)
+        if "social" in sections:
             results["social_media"] = self._analyze_social_media_tags(soup)
-            
-            # Generate recommendations and calculate overall score
+        
+        # Generate recommendations and calculate overall score (needs every section)
+        if sections == _ALL_SECTIONS:
             results["recommendations"], results["critical_issues"], results["warnings"] = self._generate_recommendations(results)
             results["seo_score"] = self._calculate_seo_score(results)
-            
-            results["status"] = "success"
-            
-        except Exception as e:
-            results["status"] = "error"
-            results["errors"].append(str(e))
-            logger.error(f"SEO analysis failed for {url} - {e}")
-        
-        return results
+    
+    async def iter_multiple_pages(self, urls: List[str], force_refresh: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Yield SEO analyses of several pages as each one finishes
+        
+        Fast pages are available immediately instead of waiting for the
+        slowest one. The shared semaphore caps how many analyses run at
+        once, so batches of any size degrade to queueing rather than
+        connection errors. Each distinct page is yielded once, in completion
+        order; match results to inputs by their normalized "url".
+        """
+        # Built on first use so a max_concurrency set after construction applies
+        if self._analysis_semaphore is None:
+            self._analysis_semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._analysis_semaphore
+        
+        async def _analyze_bounded(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.analyze_page_seo(url, force_refresh=force_refresh)
+                except Exception as e:
+                    return {"url": url, "domain": _normalize_url(url)[1], "status": "error", "seo_score": 0, "errors": [str(e)]}
+        
+        unique_urls = dict.fromkeys(_normalize_url(url)[0] for url in urls)
+        for next_result in asyncio.as_completed([_analyze_bounded(url) for url in unique_urls]):
+            yield await next_result
     
     async def _fetch_page_with_timing(self, url: str) -> Dict[str, Any]:
         """Fetch page with performance timing for technical SEO analysis
@@ -146,49 +425,137 @@ class SEOChecker:
         Uses aiohttp for async HTTP requests and measures timing metrics
         that are important for SEO performance evaluation.
         """
-        timeout = aiohttp.ClientTimeout(total=self.default_timeout)
-        headers = {'User-Agent': self.user_agent}
+        session = await self._get_session()
+        start_time = time.perf_counter()
+        trace: Dict[str, float] = {}
         
-        start_time = time.time()
-        
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            try:
-                async with session.get(url, allow_redirects=True) as response:
-                    ttfb_time = time.time()
-                    content = await response.text()
-                    end_time = time.time()
-                    
-                    return {
-                        "content": content,
-                        "status": {
-                            "code": response.status,
-                            "text": response.reason,
-                            "final_url": str(response.url)
-                        },
-                        "timing": {
-                            "ttfb_ms": round((ttfb_time - start_time) * 1000, 2),
-                            "total_ms": round((end_time - start_time) * 1000, 2),
-                            "size_bytes": len(content.encode('utf-8'))
-                        },
-                        "headers": dict(response.headers)
-                    }
-            except Exception as e:
+        try:
+            async with session.get(url, allow_redirects=True, max_redirects=self.max_redirects, trace_request_ctx=trace) as response:
+                max_bytes = self.max_page_bytes
+                # TTFB is the arrival of the first body chunk rather than the
+                # moment session.get returns, which only means headers were parsed
+                chunks = [await response.content.readany()]
+                ttfb_time = time.perf_counter()
+                size_bytes = len(chunks[0])
+                
+                # Stream the rest in bounded chunks and stop at the cap, so an
+                # oversized body is truncated whether or not it declared a length
+                truncated = size_bytes > max_bytes
+                if not truncated:
+                    async for chunk in response.content.iter_chunked(65536):
+                        chunks.append(chunk)
+                        size_bytes += len(chunk)
+                        if size_bytes > max_bytes:
+                            truncated = True
+                            break
+                
+                body = b"".join(chunks)
+                if truncated:
+                    body = body[:max_bytes]
+                    size_bytes = max_bytes
+                    logger.warning("Truncated %s at %d bytes", url, max_bytes)
+                content = body.decode(self._response_encoding(response), errors='replace')
+                end_time = time.perf_counter()
+                
+                # Connection setup includes the DNS lookup, so report them separately
+                dns_ms = self._phase_ms(trace, "dns")
+                connect_ms = round(max(0.0, self._phase_ms(trace, "connect") - dns_ms), 2)
+                
                 return {
-                    "content": "",
-                    "status": {"code": 0, "text": str(e), "final_url": url},
-                    "timing": {"ttfb_ms": 0, "total_ms": 0, "size_bytes": 0},
-                    "headers": {}
+                    "content": content,
+                    "status": {
+                        "code": response.status,
+                        "text": response.reason,
+                        "final_url": str(response.url)
+                    },
+                    "timing": {
+                        # Server response time: request sent to first body byte on
+                        # the final hop, excluding DNS and connection setup
+                        "ttfb_ms": round((ttfb_time - trace.get("headers_sent", start_time)) * 1000, 2),
+                        "dns_ms": dns_ms,
+                        "connect_ms": connect_ms,
+                        # Time spent before the final hop was requested
+                        "redirect_ms": round((trace["redirect_end"] - start_time) * 1000, 2) if "redirect_end" in trace else 0.0,
+                        "total_ms": round((end_time - start_time) * 1000, 2),
+                        "size_bytes": size_bytes
+                    },
+                    "truncated": truncated
                 }
+        except aiohttp.TooManyRedirects:
+            return self._failed_fetch(url, f"Too many redirects (more than {self.max_redirects})")
+        except Exception as e:
+            return self._failed_fetch(url, str(e))
+    
+    @staticmethod
+    def _failed_fetch(final_url: str, text: str) -> Dict[str, Any]:
+        """Page data for a fetch that produced no analyzable body"""
+        return {
+            "content": "",
+            "status": {"code": 0, "text": text, "final_url": final_url},
+            "timing": {"ttfb_ms": 0, "dns_ms": 0, "connect_ms": 0, "redirect_ms": 0, "total_ms": 0, "size_bytes": 0},
+            "truncated": False
+        }
+    
+    @staticmethod
+    def _response_encoding(response: aiohttp.ClientResponse) -> str:
+        """Charset declared by the response, or utf-8 if missing or unknown
+        
+        response.charset is the raw Content-Type parameter, so labels like
+        "utf8mb4" are validated first, as aiohttp's get_encoding() does.
+        """
+        if response.charset:
+            try:
+                return codecs.lookup(response.charset).name
+            except LookupError:
+                pass
+        return 'utf-8'
+    
+    @staticmethod
+    def _phase_ms(trace: Dict[str, float], phase: str) -> float:
+        """Duration of a traced request phase in ms (0 if it didn't happen)"""
+        start, end = trace.get(f"{phase}_start"), trace.get(f"{phase}_end")
+        if start is None or end is None:
+            return 0.0
+        return round((end - start) * 1000, 2)
+    
+    @staticmethod
+    def _head_end(html: str) -> Optional[int]:
+        """Offset just past the document's closing </head> tag, if it can be found
+        
+        A "</head>" inside an inline script, style, title or comment is
+        text, not the end of the head, so those blocks are skipped. If one
+        is left unterminated, None is returned and the page is parsed whole.
+        """
+        for match in _HEAD_END_RE.finditer(html):
+            if match.group(2):
+                return match.end()
+            if match.group(3):
+                return None
+        return None
+    
+    @staticmethod
+    def _parse_html(html: str) -> BeautifulSoup:
+        """Parse HTML with the libxml2-backed lxml parser
+        
+        Falls back to the pure-Python html.parser if lxml is not installed.
+        """
+        try:
+            return BeautifulSoup(html, 'lxml')
+        except FeatureNotFound:
+            return BeautifulSoup(html, 'html.parser')
     
     def _analyze_page_info(self, page_data: Dict, soup: BeautifulSoup) -> Dict[str, Any]:
         """Analyze basic page information for SEO fundamentals"""
+        html_tag = soup.find('html')
+        
         return {
             "status_code": page_data["status"]["code"],
             "final_url": page_data["status"]["final_url"],
             "load_time_ms": page_data["timing"]["total_ms"],
             "page_size_kb": round(page_data["timing"]["size_bytes"] / 1024, 2),
-            "has_doctype": str(soup).startswith('<!DOCTYPE'),
-            "language": soup.find('html', {'lang': True}).get('lang') if soup.find('html', {'lang': True}) else None,
+            "truncated": page_data["truncated"],
+            "has_doctype": page_data["content"].lstrip('\ufeff').lstrip()[:9].upper() == '<!DOCTYPE',
+            "language": html_tag.get('lang') if html_tag is not None else None,
             "charset": self._extract_charset(soup)
         }
     
@@ -201,7 +568,7 @@ class SEOChecker:
         content_type = soup.find('meta', {'http-equiv': 'Content-Type'})
         if content_type and content_type.get('content'):
             content = content_type.get('content')
-            match = re.search(r'charset=([^;]+)', content)
+            match = _CHARSET_RE.search(content)
             if match:
                 return match.group(1)
         
@@ -241,7 +608,7 @@ class SEOChecker:
             issues.append("Too many separators in title")
             score -= 5
         
-        if title_text.upper() == title_text and len(title_text) > 10:
+        if len(title_text) > 10 and title_text.isupper():
             issues.append("Title is in ALL CAPS")
             score -= 10
         
@@ -391,52 +758,49 @@ class SEOChecker:
     
     def _analyze_headers(self, soup: BeautifulSoup) -> Dict[str, Any]:
         """Analyze header tag structure (H1-H6) for content hierarchy"""
-        headers = {}
+        counts = [0] * 6
+        samples: List[List[str]] = [[] for _ in range(6)]
         structure_issues = []
         
-        # Extract all header tags
-        for i in range(1, 7):
-            header_tags = soup.find_all(f'h{i}')
-            headers[f'h{i}'] = {
-                "count": len(header_tags),
-                "content": [tag.get_text().strip()[:100] for tag in header_tags[:5]]  # First 5, truncated
-            }
+        # Extract all header tags in a single tree walk, bucketed by level
+        for tag in soup.find_all(_HEADER_TAGS):
+            level = int(tag.name[1]) - 1
+            counts[level] += 1
+            if len(samples[level]) < 5:  # First 5, truncated
+                samples[level].append(tag.get_text().strip()[:100])
         
         # H1 analysis (critical for SEO)
-        h1_count = headers['h1']['count']
+        h1_count = counts[0]
         if h1_count == 0:
             structure_issues.append("Missing H1 tag")
         elif h1_count > 1:
             structure_issues.append(f"Multiple H1 tags found ({h1_count}) - should have only one")
         
         # Overall structure analysis
-        has_headers = any(headers[f'h{i}']['count'] > 0 for i in range(1, 7))
-        if not has_headers:
+        if not any(counts):
             structure_issues.append("No header tags found")
         
         return {
-            "structure": headers,
+            "counts": counts,
+            "samples": samples,
             "issues": structure_issues,
             "score": 100 - (len(structure_issues) * 15)
         }
     
-    def _analyze_content(self, soup: BeautifulSoup, html_content: str) -> Dict[str, Any]:
+    def _analyze_content(self, text_content: str, html_content: str) -> Dict[str, Any]:
         """Analyze page content for SEO quality"""
-        # Extract text content for analysis
-        text_content = soup.get_text()
-        words = text_content.split()
-        word_count = len(words)
+        word_count = len(text_content.split())
         
         issues = []
         score = 100
         
         # Content length analysis
-        if word_count < 300:
-            issues.append("Content is thin (< 300 words)")
-            score -= 25
-        elif word_count < 150:
+        if word_count < 150:
             issues.append("Very thin content (< 150 words)")
             score -= 40
+        elif word_count < 300:
+            issues.append("Content is thin (< 300 words)")
+            score -= 25
         
         # Text to HTML ratio analysis
         html_size = len(html_content)
@@ -503,7 +867,8 @@ class SEOChecker:
         
         # Page speed analysis (important ranking factor)
         load_time = page_data["timing"]["total_ms"]
-        if load_time > 3000:
+        slow_load = load_time > 3000
+        if slow_load:
             issues.append("Slow page load time (> 3 seconds)")
         elif load_time > 2000:
             issues.append("Page load time could be improved (> 2 seconds)")
@@ -520,7 +885,13 @@ class SEOChecker:
         return {
             "https": is_https,
             "load_time_ms": load_time,
+            "ttfb_ms": page_data["timing"]["ttfb_ms"],
+            "dns_ms": page_data["timing"]["dns_ms"],
+            "connect_ms": page_data["timing"]["connect_ms"],
+            "redirect_ms": page_data["timing"]["redirect_ms"],
+            "slow_load": slow_load,
             "page_size_kb": round(page_data["timing"]["size_bytes"] / 1024, 2),
+            "truncated": page_data["truncated"],
             "has_schema_markup": has_schema,
             "schema_types": len(schema_scripts),
             "issues": issues
@@ -528,29 +899,21 @@ class SEOChecker:
     
     def _analyze_social_media_tags(self, soup: BeautifulSoup) -> Dict[str, Any]:
         """Analyze Open Graph and Twitter Card tags for social SEO"""
-        # Open Graph tags analysis
+        # Open Graph and Twitter Card tags, collected in one pass over <meta>
         og_tags = {}
-        og_metas = soup.find_all('meta', property=lambda x: x and x.startswith('og:'))
-        for tag in og_metas:
-            prop = tag.get('property', '').replace('og:', '')
-            og_tags[prop] = tag.get('content', '')
-        
-        # Twitter Card tags analysis
         twitter_tags = {}
-        twitter_metas = soup.find_all('meta', {'name': lambda x: x and x.startswith('twitter:')})
-        for tag in twitter_metas:
-            name = tag.get('name', '').replace('twitter:', '')
-            twitter_tags[name] = tag.get('content', '')
+        for tag in soup.find_all('meta'):
+            prop = tag.get('property', '')
+            if prop.startswith('og:'):
+                og_tags[prop[3:]] = tag.get('content', '')
+            name = tag.get('name', '')
+            if name.startswith('twitter:'):
+                twitter_tags[name[8:]] = tag.get('content', '')
         
         # Score calculation for social media optimization
-        og_score = 0
-        twitter_score = 0
-        
-        essential_og = ['title', 'description', 'image', 'url']
-        og_score = sum(25 for tag in essential_og if tag in og_tags and og_tags[tag])
+        og_score = sum(25 for tag in _ESSENTIAL_OG if tag in og_tags and og_tags[tag])
         
-        essential_twitter = ['card', 'title', 'description']
-        twitter_score = sum(33 for tag in essential_twitter if tag in twitter_tags and twitter_tags[tag])
+        twitter_score = sum(33 for tag in _ESSENTIAL_TWITTER if tag in twitter_tags and twitter_tags[tag])
         
         return {
             "open_graph": {
@@ -586,9 +949,9 @@ class SEOChecker:
             recommendations.append("Expand meta description (aim for 120-160 characters)")
         
         # Header structure recommendations
-        if results["header_analysis"]["structure"]["h1"]["count"] == 0:
+        if results["header_analysis"]["counts"][0] == 0:
             critical_issues.append("Add an H1 tag to the page")
-        elif results["header_analysis"]["structure"]["h1"]["count"] > 1:
+        elif results["header_analysis"]["counts"][0] > 1:
             warnings.append("Use only one H1 tag per page")
         
         # Content recommendations
@@ -600,56 +963,67 @@ class SEOChecker:
             recommendations.append(f"Add alt text to {results['image_analysis']['images_without_alt']} images")
         
         # Technical SEO recommendations
-        tech_issues = results["technical_seo"]["issues"]
-        for issue in tech_issues:
-            if "HTTPS" in issue:
-                critical_issues.append("Implement SSL certificate (HTTPS)")
-            elif "slow" in issue.lower():
-                recommendations.append("Improve page load speed")
+        technical = results["technical_seo"]
+        if not technical["https"]:
+            critical_issues.append("Implement SSL certificate (HTTPS)")
+        if technical["slow_load"]:
+            recommendations.append("Improve page load speed")
         
         # Social media recommendations
         if not results["social_media"]["open_graph"]["has_essential"]:
             recommendations.append("Add Open Graph tags for better social media sharing")
         
+        # Oversized pages are only partially analyzed
+        if results["page_info"]["truncated"]:
+            warnings.append(f"Page exceeds the {self.max_page_bytes:,}-byte analysis limit; only the first {self.max_page_bytes:,} bytes were analyzed")
+        
         return recommendations, critical_issues, warnings
     
     def _calculate_seo_score(self, results: Dict) -> int:
         """Calculate overall SEO score based on weighted factors"""
-        scores = []
-        
-        # Title score (20% weight) - critical for rankings
-        scores.append(results["title_analysis"].get("score", 0) * 0.20)
+        # Title, headers, content and images scores, weighted by _SEO_WEIGHTS
+        score = sum(results[section].get("score", 0) * weight for section, weight in _SEO_WEIGHTS)
         
         # Meta description score (15% weight) - important for CTR
-        scores.append(results["meta_analysis"]["description"].get("score", 0) * 0.15)
-        
-        # Headers score (15% weight) - content structure
-        scores.append(results["header_analysis"].get("score", 0) * 0.15)
-        
-        # Content score (20% weight) - content quality
-        scores.append(results["content_analysis"].get("score", 0) * 0.20)
-        
-        # Images score (10% weight) - accessibility and SEO
-        scores.append(results["image_analysis"].get("score", 0) * 0.10)
+        score += results["meta_analysis"]["description"].get("score", 0) * 0.15
         
         # Technical SEO score (20% weight) - technical factors
-        tech_score = 100
-        if results["technical_seo"]["issues"]:
-            tech_score -= len(results["technical_seo"]["issues"]) * 20
-        scores.append(max(0, tech_score) * 0.20)
+        tech_score = 100 - len(results["technical_seo"]["issues"]) * 20
+        score += max(0, tech_score) * 0.20
         
-        return round(sum(scores))
+        return round(score)
 
 # Initialize SEO checker instance
 # This will be used by all MCP tools
 seo_checker = SEOChecker()
 
+# SEO score grading table: (minimum score, emoji, grade), highest first
+_SCORE_GRADES = (
+    (90, "🏆", "EXCELLENT"),
+    (80, "🟢", "GOOD"),
+    (70, "🟡", "FAIR"),
+    (60, "🟠", "NEEDS WORK"),
+)
+
+# Coarser health table used by the quick and batch checks
+_HEALTH_GRADES = (
+    (80, "🟢", "GOOD"),
+    (60, "🟡", "NEEDS WORK"),
+)
+
+def _grade_score(score: int, grades: Tuple[Tuple[int, str, str], ...] = _SCORE_GRADES) -> Tuple[str, str]:
+    """Map an SEO score to its (emoji, grade) using a grading table"""
+    for min_score, emoji, grade in grades:
+        if score >= min_score:
+            return emoji, grade
+    return "🔴", "POOR"
+
 # MCP TOOLS
 # Tools are functions that MCP clients can call to perform actions
 # They must be decorated with @mcp.tool() and should be async
 
 @mcp.tool()
-async def analyze_seo(url: str) -> str:
+async def analyze_seo(url: str, force_refresh: bool = False) -> str:
     """Comprehensive SEO analysis of a webpage
     
     This MCP tool provides detailed SEO analysis with scoring and recommendations.
@@ -657,40 +1031,31 @@ async def analyze_seo(url: str) -> str:
     
     Args:
         url: The webpage URL to analyze (e.g., 'example.com' or 'https://example.com')
+        force_refresh: Re-analyze the page instead of using a recent cached result
     
     Returns:
         Detailed SEO analysis and recommendations
     """
-    result = await seo_checker.analyze_page_seo(url)
+    result = await seo_checker.analyze_page_seo(url, force_refresh=force_refresh)
     
     if result["status"] == "error":
         return f"❌ SEO analysis failed for {url}\n\nErrors:\n" + "\n".join(result["errors"])
     
     # SEO Score emoji and grade determination
     score = result["seo_score"]
-    if score >= 90:
-        score_emoji = "🏆"
-        grade = "EXCELLENT"
-    elif score >= 80:
-        score_emoji = "🟢"
-        grade = "GOOD"
-    elif score >= 70:
-        score_emoji = "🟡"
-        grade = "FAIR"
-    elif score >= 60:
-        score_emoji = "🟠"
-        grade = "NEEDS WORK"
-    else:
-        score_emoji = "🔴"
-        grade = "POOR"
+    score_emoji, grade = _grade_score(score)
     
     title = result["title_analysis"]
     meta_desc = result["meta_analysis"]["description"]
-    headers = result["header_analysis"]
+    header_counts = result["header_analysis"]["counts"]
     content = result["content_analysis"]
     images = result["image_analysis"]
+    technical = result["technical_seo"]
+    critical_issues = result["critical_issues"]
+    recommendations = result["recommendations"]
+    warnings = result["warnings"]
     
-    response = f"""{score_emoji} SEO Analysis for {result["domain"]}
+    parts: List[str] = [f"""{score_emoji} SEO Analysis for {result["domain"]}
 
 🎯 OVERALL SEO SCORE: {score}/100 ({grade})
 
@@ -705,9 +1070,9 @@ async def analyze_seo(url: str) -> str:
 • Status: {'✅ Good' if meta_desc.get('score', 0) >= 80 else '⚠️ Needs improvement'}
 
 🏗️ HEADER STRUCTURE
-• H1 Tags: {headers['structure']['h1']['count']} {'✅' if headers['structure']['h1']['count'] == 1 else '⚠️'}
-• H2 Tags: {headers['structure']['h2']['count']}
-• H3 Tags: {headers['structure']['h3']['count']}
+• H1 Tags: {header_counts[0]} {'✅' if header_counts[0] == 1 else '⚠️'}
+• H2 Tags: {header_counts[1]}
+• H3 Tags: {header_counts[2]}
 
 📊 CONTENT ANALYSIS
 • Word Count: {content['word_count']} words
@@ -720,31 +1085,37 @@ async def analyze_seo(url: str) -> str:
 • Missing Alt Text: {images['images_without_alt']}
 
 ⚡ TECHNICAL SEO
-• HTTPS: {'✅ Yes' if result['technical_seo']['https'] else '❌ No'}
-• Load Time: {result['technical_seo']['load_time_ms']}ms
-• Page Size: {result['technical_seo']['page_size_kb']} KB
-• Schema Markup: {'✅ Yes' if result['technical_seo']['has_schema_markup'] else '❌ No'}
-"""
+• HTTPS: {'✅ Yes' if technical['https'] else '❌ No'}
+• Load Time: {technical['load_time_ms']}ms
+• Page Size: {technical['page_size_kb']} KB
+• Schema Markup: {'✅ Yes' if technical['has_schema_markup'] else '❌ No'}
+"""]
     
     # Critical issues section
-    if result["critical_issues"]:
-        response += f"\n🚨 CRITICAL ISSUES ({len(result['critical_issues'])})\n"
-        for issue in result["critical_issues"]:
-            response += f"• {issue}\n"
+    if critical_issues:
+        parts.append(f"\n🚨 CRITICAL ISSUES ({len(critical_issues)})\n")
+        for issue in critical_issues:
+            parts.append(f"• {issue}\n")
     
     # Recommendations section
-    if result["recommendations"]:
-        response += f"\n💡 RECOMMENDATIONS ({len(result['recommendations'])})\n"
-        for rec in result["recommendations"][:5]:  # Top 5 recommendations
-            response += f"• {rec}\n"
+    if recommendations:
+        parts.append(f"\n💡 RECOMMENDATIONS ({len(recommendations)})\n")
+        for rec in recommendations[:5]:  # Top 5 recommendations
+            parts.append(f"• {rec}\n")
         
-        if len(result["recommendations"]) > 5:
-            response += f"• ... and {len(result['recommendations']) - 5} more recommendations\n"
+        if len(recommendations) > 5:
+            parts.append(f"• ... and {len(recommendations) - 5} more recommendations\n")
     
-    return response
+    # Warnings section
+    if warnings:
+        parts.append(f"\n⚠️ WARNINGS ({len(warnings)})\n")
+        for warning in warnings:
+            parts.append(f"• {warning}\n")
+    
+    return "".join(parts)
 
 @mcp.tool()
-async def seo_quick_check(url: str) -> str:
+async def seo_quick_check(url: str, force_refresh: bool = False) -> str:
     """Quick SEO health check
     
     This MCP tool provides a rapid SEO status overview.
@@ -752,11 +1123,12 @@ async def seo_quick_check(url: str) -> str:
     
     Args:
         url: The webpage URL to check
+        force_refresh: Re-analyze the page instead of using a recent cached result
     
     Returns:
         Brief SEO status summary
     """
-    result = await seo_checker.analyze_page_seo(url)
+    result = await seo_checker.analyze_page_seo(url, force_refresh=force_refresh)
     
     if result["status"] == "error":
         return f"❌ Cannot analyze {url}: {'; '.join(result['errors'])}"
@@ -767,21 +1139,13 @@ async def seo_quick_check(url: str) -> str:
     # Quick status indicators for key SEO factors
     title_ok = result["title_analysis"].get("score", 0) >= 80
     meta_ok = result["meta_analysis"]["description"].get("score", 0) >= 80
-    h1_ok = result["header_analysis"]["structure"]["h1"]["count"] == 1
+    h1_ok = result["header_analysis"]["counts"][0] == 1
     content_ok = result["content_analysis"]["word_count"] >= 300
     images_ok = result["image_analysis"]["images_without_alt"] == 0
     https_ok = result["technical_seo"]["https"]
     
     # Score emoji and status
-    if score >= 80:
-        score_emoji = "🟢"
-        status = "GOOD"
-    elif score >= 60:
-        score_emoji = "🟡"
-        status = "NEEDS WORK"
-    else:
-        score_emoji = "🔴"
-        status = "POOR"
+    score_emoji, status = _grade_score(score, _HEALTH_GRADES)
     
     return f"""{score_emoji} {domain} - SEO Health: {status} ({score}/100)
 
@@ -792,7 +1156,7 @@ Quick Checks:
 {len(result['critical_issues'])} critical issues, {len(result['recommendations'])} recommendations"""
 
 @mcp.tool()
-async def seo_meta_tags_check(url: str) -> str:
+async def seo_meta_tags_check(url: str, force_refresh: bool = False) -> str:
     """Focused analysis of meta tags and social media optimization
     
     This MCP tool provides detailed analysis of meta tags and social sharing.
@@ -800,20 +1164,24 @@ async def seo_meta_tags_check(url: str) -> str:
     
     Args:
         url: The webpage URL to analyze
+        force_refresh: Re-analyze the page instead of using a recent cached result
     
     Returns:
         Detailed meta tags and social media analysis
     """
-    result = await seo_checker.analyze_page_seo(url)
+    result = await seo_checker.analyze_page_seo(url, _META_TAG_SECTIONS, force_refresh=force_refresh)
     
     if result["status"] == "error":
         return f"❌ Meta tags analysis failed for {url}\n\nErrors:\n" + "\n".join(result["errors"])
     
     title = result["title_analysis"]
     meta = result["meta_analysis"]
+    description = meta['description']
+    robots = meta['robots']
+    canonical = meta['canonical']
     social = result["social_media"]
     
-    response = f"""🏷️ Meta Tags & Social Media Analysis for {result["domain"]}
+    parts: List[str] = [f"""🏷️ Meta Tags & Social Media Analysis for {result["domain"]}
 
 📄 TITLE TAG
 • Content: "{title.get('content', 'MISSING')}"
@@ -821,56 +1189,136 @@ async def seo_meta_tags_check(url: str) -> str:
 • Issues: {', '.join(title.get('issues', [])) or 'None'}
 
 📝 META DESCRIPTION
-• Content: "{meta['description'].get('content', 'MISSING')}"
-• Length: {meta['description'].get('length', 0)} characters (optimal: 120-160)
-• Issues: {', '.join(meta['description'].get('issues', [])) or 'None'}
+• Content: "{description.get('content', 'MISSING')}"
+• Length: {description.get('length', 0)} characters (optimal: 120-160)
+• Issues: {', '.join(description.get('issues', [])) or 'None'}
 
 🔍 META ROBOTS
-• Status: {'Present' if meta['robots']['exists'] else 'Not set (default: index,follow)'}
-"""
+• Status: {'Present' if robots['exists'] else 'Not set (default: index,follow)'}
+"""]
     
-    if meta['robots']['exists']:
-        response += f"• Directives: {', '.join(meta['robots']['directives'])}\n"
-        if meta['robots']['issues']:
-            response += f"• Issues: {', '.join(meta['robots']['issues'])}\n"
+    if robots['exists']:
+        parts.append(f"• Directives: {', '.join(robots['directives'])}\n")
+        if robots['issues']:
+            parts.append(f"• Issues: {', '.join(robots['issues'])}\n")
     
-    response += f"""
+    parts.append(f"""
 🔗 CANONICAL URL
-• Status: {'Present' if meta['canonical']['exists'] else 'Missing'}
-"""
+• Status: {'Present' if canonical['exists'] else 'Missing'}
+""")
     
-    if meta['canonical']['exists']:
-        response += f"• URL: {meta['canonical'].get('url', 'Empty')}\n"
-        if meta['canonical']['issues']:
-            response += f"• Issues: {', '.join(meta['canonical']['issues'])}\n"
+    if canonical['exists']:
+        parts.append(f"• URL: {canonical.get('url', 'Empty')}\n")
+        if canonical['issues']:
+            parts.append(f"• Issues: {', '.join(canonical['issues'])}\n")
     
     # Social Media Tags Analysis
     og = social['open_graph']
     twitter = social['twitter_cards']
+    og_tags = og['tags']
+    twitter_tags = twitter['tags']
     
-    response += f"""
+    parts.append(f"""
 📱 SOCIAL MEDIA OPTIMIZATION
 • Open Graph Score: {og['score']}/100
 • Twitter Cards Score: {twitter['score']}/100
 
-🌍 OPEN GRAPH TAGS ({len(og['tags'])} found)
-"""
+🌍 OPEN GRAPH TAGS ({len(og_tags)} found)
+""")
     
-    essential_og = ['title', 'description', 'image', 'url']
-    for tag in essential_og:
-        status = "✅" if tag in og['tags'] and og['tags'][tag] else "❌"
-        content = og['tags'].get(tag, 'Missing')[:60]
-        response += f"• og:{tag}: {status} {content}\n"
+    for tag in _ESSENTIAL_OG:
+        value = og_tags.get(tag)
+        status = "✅" if value else "❌"
+        content = ('Missing' if value is None else value)[:60]
+        parts.append(f"• og:{tag}: {status} {content}\n")
     
-    response += f"\n🐦 TWITTER CARD TAGS ({len(twitter['tags'])} found)\n"
+    parts.append(f"\n🐦 TWITTER CARD TAGS ({len(twitter_tags)} found)\n")
     
-    essential_twitter = ['card', 'title', 'description']
-    for tag in essential_twitter:
-        status = "✅" if tag in twitter['tags'] and twitter['tags'][tag] else "❌"
-        content = twitter['tags'].get(tag, 'Missing')[:60]
-        response += f"• twitter:{tag}: {status} {content}\n"
+    for tag in _ESSENTIAL_TWITTER:
+        value = twitter_tags.get(tag)
+        status = "✅" if value else "❌"
+        content = ('Missing' if value is None else value)[:60]
+        parts.append(f"• twitter:{tag}: {status} {content}\n")
     
-    return response
+    return "".join(parts)
+
+def _format_batch_line(result: Dict[str, Any]) -> str:
+    """One-line summary of a page analysis for the batch comparison"""
+    if result["status"] == "error":
+        return f"❌ {result['url']}: {'; '.join(result['errors'])}\n"
+    
+    score = result["seo_score"]
+    score_emoji, _ = _grade_score(score, _HEALTH_GRADES)
+    
+    return f"{score_emoji} {result['url']}: {score}/100 | {len(result['critical_issues'])} critical issues, {len(result['recommendations'])} recommendations\n"
+
+@mcp.tool()
+async def seo_batch_check(urls: List[str], force_refresh: bool = False, ctx: Optional[Context] = None) -> str:
+    """Compare the SEO health of several webpages
+    
+    This MCP tool runs a quick SEO check on each URL concurrently and
+    returns a one-line summary per page for side-by-side comparison.
+    Each line is also sent as a progress update as soon as that page
+    finishes, so clients can show fast pages before slow ones complete.
+    
+    Args:
+        urls: List of webpage URLs to compare (max 50)
+        force_refresh: Re-analyze the pages instead of using recent cached results
+    
+    Returns:
+        SEO score summary for each webpage
+    """
+    if not urls:
+        return "❌ Please provide at least one URL"
+    
+    # Each distinct page is reported once, in the order it was first given
+    order = list(dict.fromkeys(_normalize_url(url)[0] for url in urls))
+    total = len(order)
+    if total > seo_checker.max_batch_urls:
+        return f"❌ Maximum {seo_checker.max_batch_urls} URLs allowed per batch"
+    
+    lines: Dict[str, str] = {}
+    
+    # Stream each page's line as it completes, then report in input order
+    async for result in seo_checker.iter_multiple_pages(order, force_refresh):
+        lines[result["url"]] = line = _format_batch_line(result)
+        if ctx is not None:
+            await ctx.report_progress(len(lines), total, message=line.rstrip())
+    
+    parts: List[str] = [f"📊 SEO Comparison ({len(order)} pages)\n\n"]
+    parts.extend(lines[url] for url in order)
+    return "".join(parts)
+
+def _json_report(result: Dict[str, Any]) -> str:
+    """Return the JSON view of an analysis result
+    
+    The JSON outputs keep the per-level header "structure" mapping that
+    clients of the resource already read; it is built here rather than in
+    the analysis so the formatted tools don't pay for it.
+    """
+    headers = result.get("header_analysis")
+    if headers and "counts" in headers:
+        structure = {tag: {"count": count, "content": content} for tag, count, content in zip(_HEADER_TAGS, headers["counts"], headers["samples"])}
+        result = {**result, "header_analysis": {**headers, "structure": structure}}
+    return _dumps(result)
+
+@mcp.tool()
+async def seo_full_report_json(url: str, force_refresh: bool = False) -> str:
+    """Full SEO analysis of a webpage as structured JSON
+    
+    This MCP tool returns the complete analysis data (the same data as the
+    seo://analyze resource) for clients that want to process the results
+    themselves rather than read a formatted report.
+    
+    Args:
+        url: The webpage URL to analyze
+        force_refresh: Re-analyze the page instead of using a recent cached result
+    
+    Returns:
+        SEO analysis results as indented JSON
+    """
+    result = await seo_checker.analyze_page_seo(url, force_refresh=force_refresh)
+    return _json_report(result)
 
 # MCP RESOURCES
 # Resources are data that can be accessed by MCP clients using URIs
@@ -885,19 +1333,25 @@ async def seo_analysis_resource(url: str) -> str:
     
     Resources return raw data (JSON) rather than formatted strings.
     """
-    # URL decode if needed for proper processing
-    url = url.replace('%2F', '/').replace('%3A', ':')
+    # FastMCP already percent-decodes template parameters; decoding again
+    # would corrupt escapes that belong to the target URL itself
     result = await seo_checker.analyze_page_seo(url)
-    return json.dumps(result, indent=2, default=str)
+    return _json_report(result)
 
 # MCP SERVER STARTUP
 # This section configures and starts the MCP server for remote deployment
 if __name__ == "__main__":
-    import os
-    
     # Get port from environment variable (used by hosting platforms like Hostinger)
     port = int(os.environ.get("PORT", 8080))
     
+    # Use uvloop's libuv-based event loop when it is installed; it is not
+    # available on Windows, where the default asyncio loop is used instead
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     # Start the MCP server with HTTP transport for remote access
     # - transport="streamable-http": Uses HTTP for communication with MCP clients
     # - host="0.0.0.0": Accepts connections from any IP (needed for remote deployment)